@@ -70,6 +70,12 @@ if not ALLOWED_ORIGINS:
     origins.append("http://127.0.0.1:8000")
     ALLOWED_ORIGINS = origins
 
+# Rate-limit counters: memory:// is per-process; use redis://host:6379 to share them across workers
+RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+
+# Re-read edited templates without a restart (development, or a bind-mounted templates/ dir)
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "false").lower() == "true"
+
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "true").lower() == "true"
 if PRIMARY_DOMAIN in ("example.com", "localhost") or "localhost" in PRIMARY_DOMAIN or "127.0.0.1" in PRIMARY_DOMAIN:
     COOKIE_SECURE = False
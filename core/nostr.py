@@ -1,80 +1,161 @@
 import asyncio
-import json
+import functools
+import gzip
+import hashlib
 import logging
 import os
-import re
+import secrets
 import shutil
-import tempfile
 import time
-import bech32
+import orjson
 from config import get_nostr_json_path, get_nostr_json_backup, PRIMARY_DOMAIN, NOSTR_DATA_DIR, _LEGACY_NOSTR_JSON, NOSTR_RELAYS, NOSTR_PRIVATE_KEY
 
 logger = logging.getLogger(__name__)
 
-_nostr_json_lock = asyncio.Lock()
-
 _nostr_notification_lock = asyncio.Lock()
 
+# Per-domain in-memory copy of nostr.json keyed by file (mtime_ns, size).
+# Cached dicts are never mutated: writers stage changes on a copy (see _DomainWriter),
+# which save_nostr_json installs as the new entry once it is on disk.
+_nostr_cache: dict[str, dict] = {}
+
+
+_BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_BECH32_VALUES = {c: i for i, c in enumerate(_BECH32_CHARSET)}
+_BECH32_GENERATOR = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+
+
+def _bech32_polymod_step(chk: int, value: int) -> int:
+    top = chk >> 25
+    chk = (chk & 0x1FFFFFF) << 5 ^ value
+    for i in range(5):
+        if (top >> i) & 1:
+            chk ^= _BECH32_GENERATOR[i]
+    return chk
+
 
+def _bech32_hrp_state(hrp: str) -> int:
+    chk = 1
+    for value in [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]:
+        chk = _bech32_polymod_step(chk, value)
+    return chk
+
+
+# Checksum state after the constant "npub" prefix, so decoding only walks the data part
+_NPUB_HRP_STATE = _bech32_hrp_state("npub")
+
+
+def _decode_npub(npub: str) -> bytes:
+    """Decode a bech32 npub into its raw key bytes (same rules as bech32_decode + convertbits)."""
+    # "npub" + "1" + 52 data chars (32 bytes) + 6 checksum chars
+    if len(npub) != 63:
+        raise ValueError("Invalid npub length")
+    if npub.lower() != npub and npub.upper() != npub:
+        raise ValueError("mixed case")
+    npub = npub.lower()
+    pos = npub.rfind("1")
+    if pos < 1 or pos + 7 > len(npub) or len(npub) > 90:
+        raise ValueError("invalid length or separator")
+    if npub[:pos] != "npub":
+        raise ValueError("Invalid npub format")
+    try:
+        data = [_BECH32_VALUES[c] for c in npub[pos + 1:]]
+    except KeyError:
+        raise ValueError("invalid character") from None
+
+    chk = _NPUB_HRP_STATE
+    for value in data:
+        chk = _bech32_polymod_step(chk, value)
+    if chk != 1:
+        raise ValueError("invalid checksum")
+
+    # Regroup 5-bit words into bytes in one big-int pass; leftover padding must be < 5 zero bits
+    acc = 0
+    for value in data[:-6]:
+        acc = acc << 5 | value
+    nbits = 5 * (len(data) - 6)
+    pad = nbits % 8
+    if pad >= 5 or acc & ((1 << pad) - 1):
+        raise ValueError("Invalid npub conversion")
+    return (acc >> pad).to_bytes(nbits // 8, "big")
+
+
+@functools.lru_cache(maxsize=4096)
 def convert_npub_to_hex(npub: str) -> str:
     if npub.startswith("npub"):
         try:
-            hrp, data = bech32.bech32_decode(npub)
-            if hrp != "npub" or data is None:
-                raise ValueError("Invalid npub format")
-            converted = bech32.convertbits(data, 5, 8, False)
-            if converted is None:
-                raise ValueError("Invalid npub conversion")
-            return ''.join(f'{x:02x}' for x in converted)
-        except Exception as e:
+            return _decode_npub(npub).hex()
+        except ValueError as e:
             raise ValueError(f"Invalid npub format: {e}")
-    elif re.match(r"^[0-9a-fA-F]{64}$", npub):
-        return npub.lower()
-    else:
-        raise ValueError("Key must be npub or 64-character hex")
+    if len(npub) == 64:
+        try:
+            raw = bytes.fromhex(npub)
+        except ValueError:
+            raw = b""
+        # fromhex skips whitespace, so a short result means the input was not pure hex
+        if len(raw) == 32:
+            return raw.hex()
+    raise ValueError("Key must be npub or 64-character hex")
 
 
 def _atomic_write_json(path, data):
     """Write JSON atomically using temp file + fsync + rename."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = None
+    blob = memoryview(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    # Keep the .tmp.json suffix so startup cleanup finds orphans
+    tmp_path = path.with_name(f"{path.name}.{secrets.token_hex(4)}.tmp.json")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
     try:
-        with tempfile.NamedTemporaryFile(
-            mode='w', dir=path.parent, delete=False, suffix='.tmp.json'
-        ) as tmp:
-            json.dump(data, tmp, indent=2)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-            tmp_path = tmp.name
-        shutil.move(tmp_path, path)
-        os.chmod(path, 0o644)
+        try:
+            os.fchmod(fd, 0o644)
+            while blob:
+                blob = blob[os.write(fd, blob):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
     except Exception:
-        if tmp_path and os.path.exists(tmp_path):
+        if os.path.exists(tmp_path):
             os.unlink(tmp_path)
         raise
 
 
+def _snapshot_backup(path, backup_path) -> None:
+    """Point backup_path at the current file's inode so it keeps the previous version.
+
+    The atomic write replaces the directory entry with a new inode, so a hard link
+    preserves the old contents without copying any bytes. Falls back to a full copy
+    on filesystems that do not support hard links.
+    """
+    link_tmp = backup_path.with_name(backup_path.name + ".tmp")
+    try:
+        if os.path.lexists(link_tmp):
+            os.unlink(link_tmp)
+        os.link(path, link_tmp)
+        os.replace(link_tmp, backup_path)
+    except OSError:
+        shutil.copy2(path, backup_path)
+
+
 def load_nostr_json(domain: str) -> dict:
     nostr_json_path = get_nostr_json_path(domain)
     backup_path = get_nostr_json_backup(domain)
     try:
-        with open(nostr_json_path, "r") as f:
-            data = json.load(f)
-            count = len(data.get("names", {}))
-            logger.info(f"Loaded nostr.json for {domain} with {count} entries")
-            return data
+        data = orjson.loads(nostr_json_path.read_bytes())
+        count = len(data.get("names", {}))
+        logger.info(f"Loaded nostr.json for {domain} with {count} entries")
+        return data
     except FileNotFoundError:
         logger.warning(f"nostr.json not found for {domain} at {nostr_json_path}")
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"nostr.json for {domain} is corrupt: invalid JSON at position {e.pos}")
         if backup_path.exists():
             try:
-                with open(backup_path, "r") as f:
-                    data = json.load(f)
+                data = orjson.loads(backup_path.read_bytes())
                 count = len(data.get("names", {}))
                 logger.info(f"Recovered {count} entries from backup for {domain}")
                 return data
-            except (json.JSONDecodeError, OSError):
+            except (orjson.JSONDecodeError, OSError):
                 logger.error(f"Backup for {domain} is also corrupt")
     except OSError as e:
         logger.error(f"Error reading nostr.json for {domain}: {e.filename or 'unknown file'}")
@@ -89,22 +170,120 @@ def save_nostr_json(data: dict, domain: str) -> None:
     backup_path = get_nostr_json_backup(domain)
 
     if nostr_json_path.exists():
-        shutil.copy2(nostr_json_path, backup_path)
+        _snapshot_backup(nostr_json_path, backup_path)
 
     _atomic_write_json(nostr_json_path, data)
+    _nostr_cache[domain] = _build_cache_entry(_stat_key(nostr_json_path), data)
     count = len(data["names"])
     logger.info(f"Saved nostr.json for {domain} with {count} entries")
 
 
+def _stat_key(path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _build_cache_entry(stat_key: tuple[int, int] | None, data: dict) -> dict:
+    names = data["names"]
+    return {
+        "stat": stat_key,
+        "data": data,
+        "names_lower": {k.lower(): k for k in names},
+        "hex_lower": frozenset(v.lower() for v in names.values()),
+    }
+
+
+def _usable_cache_entry(domain: str) -> dict | None:
+    """Return the cached entry if it still matches the file on disk, else None."""
+    entry = _nostr_cache.get(domain)
+    if entry is None:
+        return None
+    writer = _writers.get(domain)
+    if writer is not None and writer.inflight is not None:
+        # Our own write is landing: the file may already be replaced, but its entry is
+        # installed when the write returns, so don't re-parse it here in the meantime
+        return entry
+    if entry["stat"] != _stat_key(get_nostr_json_path(domain)):
+        return None
+    return entry
+
+
+def _get_cache_entry(domain: str) -> dict:
+    entry = _usable_cache_entry(domain)
+    if entry is not None:
+        return entry
+    key = _stat_key(get_nostr_json_path(domain))
+    data = load_nostr_json(domain)
+    if not isinstance(data.get("names"), dict):
+        data["names"] = {}
+    entry = _build_cache_entry(key, data)
+    _nostr_cache[domain] = entry
+    return entry
+
+
+async def refresh_nostr_cache(domain: str) -> None:
+    """Re-read nostr.json in a worker thread if it changed, so the sync accessors below hit the cache."""
+    if _usable_cache_entry(domain) is None:
+        await asyncio.to_thread(_get_cache_entry, domain)
+
+
+def load_nostr_json_cached(domain: str) -> dict:
+    """Return nostr.json for a domain, re-reading the file only when its mtime or size changed."""
+    return _get_cache_entry(domain)["data"]
+
+
+def _entry_body(entry: dict) -> tuple[bytes, str]:
+    body = entry.get("body")
+    if body is None:
+        body = orjson.dumps({"names": entry["data"]["names"]})
+        entry["body"] = body
+        entry["etag"] = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+    return body, entry["etag"]
+
+
+def get_nostr_json_body(domain: str) -> tuple[bytes, str]:
+    """Return the served {"names": ...} document as bytes plus its ETag, built once per cache entry."""
+    return _entry_body(_get_cache_entry(domain))
+
+
+# Below this the gzip framing outweighs the savings
+_GZIP_MIN_SIZE = 500
+
+
+def get_nostr_json_gzip(domain: str) -> tuple[bytes, str] | None:
+    """Return the gzip-encoded body and its ETag, or None when the document is too small to bother."""
+    entry = _get_cache_entry(domain)
+    body, etag = _entry_body(entry)
+    if len(body) < _GZIP_MIN_SIZE:
+        return None
+    gz = entry.get("body_gz")
+    if gz is None:
+        gz = gzip.compress(body, compresslevel=6, mtime=0)
+        entry["body_gz"] = gz
+        entry["etag_gz"] = f'{etag[:-1]}-gz"'
+    return gz, entry["etag_gz"]
+
+
+def find_name_key(domain: str, username: str) -> str | None:
+    """Return the stored key matching username case-insensitively, or None."""
+    return _get_cache_entry(domain)["names_lower"].get(username.lower().strip())
+
+
+def is_pubkey_registered(domain: str, pubkey_hex: str) -> bool:
+    return pubkey_hex.lower() in _get_cache_entry(domain)["hex_lower"]
+
+
 def migrate_to_per_domain():
     """One-time migration: split centralized nostr.json into per-domain files."""
     if not _LEGACY_NOSTR_JSON.exists():
         return
 
     try:
-        with open(_LEGACY_NOSTR_JSON, "r") as f:
-            legacy_data = json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
+        legacy_data = orjson.loads(_LEGACY_NOSTR_JSON.read_bytes())
+    except (orjson.JSONDecodeError, OSError) as e:
         logger.error(f"Cannot read legacy nostr.json for migration: {e}")
         return
 
@@ -129,10 +308,9 @@ def migrate_to_per_domain():
         # Merge if destination already exists
         if nostr_json_path.exists():
             try:
-                with open(nostr_json_path, "r") as f:
-                    existing = json.load(f)
+                existing = orjson.loads(nostr_json_path.read_bytes())
                 existing_names = existing.get("names", {})
-            except (json.JSONDecodeError, OSError):
+            except (orjson.JSONDecodeError, OSError):
                 existing_names = {}
         else:
             existing_names = {}
@@ -152,11 +330,9 @@ async def check_nip05_available(nip05: str, domain: str) -> bool:
     nip05_lower = nip05.lower().strip()
     nip05_full = f"{nip05_lower}@{domain}"
 
-    async with _nostr_json_lock:
-        data = load_nostr_json(domain)
-        for existing in data.get("names", {}).keys():
-            if existing.lower() == nip05_lower:
-                return False
+    await refresh_nostr_cache(domain)
+    if find_name_key(domain, nip05_lower) is not None:
+        return False
 
     db = await get_db()
     cursor = await db.execute(
@@ -167,21 +343,96 @@ async def check_nip05_available(nip05: str, domain: str) -> bool:
     return row is None
 
 
+class _DomainWriter:
+    """Group-commit state for one domain's nostr.json.
+
+    Writers stage changes synchronously into ``pending`` (a private copy of the names)
+    and await ``committed``. One flush task writes each batch, so every change that
+    arrives while a write is in flight lands in the next single write.
+    """
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.pending: dict | None = None
+        self.pending_lower: dict | None = None
+        self.committed: asyncio.Future | None = None
+        self.inflight: dict | None = None
+        self.inflight_lower: dict | None = None
+        self.write_lock = asyncio.Lock()
+
+
+_writers: dict[str, _DomainWriter] = {}
+_flush_tasks: set[asyncio.Task] = set()
+
+
+def _get_writer(domain: str) -> _DomainWriter:
+    writer = _writers.get(domain)
+    if writer is None:
+        writer = _writers[domain] = _DomainWriter(domain)
+    return writer
+
+
+def _latest_names(writer: _DomainWriter) -> tuple[dict, dict]:
+    """Names plus lowercase index as writers must see them: staged, then in flight, then on disk."""
+    if writer.pending is not None:
+        return writer.pending["names"], writer.pending_lower
+    if writer.inflight is not None:
+        return writer.inflight["names"], writer.inflight_lower
+    entry = _get_cache_entry(writer.domain)
+    return entry["data"]["names"], entry["names_lower"]
+
+
+def _stage(writer: _DomainWriter) -> tuple[dict, dict, asyncio.Future]:
+    """Return the batch's mutable names/index and the future resolved once it is on disk."""
+    if writer.pending is None:
+        if writer.inflight is not None:
+            base, base_lower = writer.inflight, writer.inflight_lower
+        else:
+            entry = _get_cache_entry(writer.domain)
+            base, base_lower = entry["data"], entry["names_lower"]
+        writer.pending = {**base, "names": dict(base["names"])}
+        writer.pending_lower = dict(base_lower)
+        writer.committed = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(_flush(writer))
+        _flush_tasks.add(task)
+        task.add_done_callback(_flush_tasks.discard)
+    return writer.pending["names"], writer.pending_lower, writer.committed
+
+
+async def _flush(writer: _DomainWriter) -> None:
+    async with writer.write_lock:
+        if writer.pending is None:
+            return
+        data, lower, committed = writer.pending, writer.pending_lower, writer.committed
+        writer.pending = writer.pending_lower = writer.committed = None
+        writer.inflight, writer.inflight_lower = data, lower
+        try:
+            await asyncio.to_thread(save_nostr_json, data, writer.domain)
+        except Exception as e:
+            committed.set_exception(e)
+            # Anything staged meanwhile was built on top of this batch; fail it as well
+            if writer.pending is not None:
+                writer.committed.set_exception(e)
+                writer.pending = writer.pending_lower = writer.committed = None
+        else:
+            committed.set_result(None)
+        finally:
+            writer.inflight = writer.inflight_lower = None
+
+
 async def check_and_add_nip05_entry(username: str, pubkey_hex: str, domain: str) -> bool:
     from db.records import db_update_nostr_json_status
-    async with _nostr_json_lock:
-        data = load_nostr_json(domain)
-        if "names" not in data:
-            data["names"] = {}
-
-        username_lower = username.lower().strip()
-        for existing in data["names"].keys():
-            if existing.lower() == username_lower:
-                return False
+    await refresh_nostr_cache(domain)
+    writer = _get_writer(domain)
+    _, names_lower = _latest_names(writer)
+    if username.lower().strip() in names_lower:
+        return False
 
-        data["names"][username] = pubkey_hex
-        save_nostr_json(data, domain)
-        logger.info(f"Added NIP-05 entry for user: {username}@{domain}")
+    names, names_lower, committed = _stage(writer)
+    names[username] = pubkey_hex
+    names_lower[username.lower()] = username
+    await committed
+    logger.info(f"Added NIP-05 entry for user: {username}@{domain}")
 
     await db_update_nostr_json_status(f"{username}@{domain}", True)
 
@@ -193,38 +444,43 @@ async def check_and_add_nip05_entry(username: str, pubkey_hex: str, domain: str)
 async def check_and_add_nip05_entry_atomic(username: str, pubkey_hex: str, payment_hash: str, domain: str) -> bool:
     """Atomically verify username availability, write nostr.json, and confirm payment in DB.
 
-    All three operations happen inside a single lock acquisition to eliminate the race
-    condition between availability check, file write, and DB update.
+    The name is re-checked and staged without yielding, so no other writer can claim it.
+    The payment is confirmed only once the nostr.json batch containing the name is on
+    disk, with the UPDATE and its commit issued back to back: the connection is shared,
+    so a transaction left open across the write could be committed or rolled back by
+    another handler.
 
-    If writing nostr.json fails, DB is rolled back to maintain consistency.
+    If the DB update fails or the pending record is gone, the entry is removed again.
     """
     from db.connection import get_db
-    async with _nostr_json_lock:
-        data = load_nostr_json(domain)
-        if "names" not in data:
-            data["names"] = {}
-
-        username_lower = username.lower().strip()
-        for existing in data["names"].keys():
-            if existing.lower() == username_lower:
-                return False
-
-        db = await get_db()
-        ts = int(time.time())
-        await db.execute(
+    await refresh_nostr_cache(domain)
+    writer = _get_writer(domain)
+    username_lower = username.lower().strip()
+    if username_lower in _latest_names(writer)[1]:
+        return False
+
+    names, names_lower, committed = _stage(writer)
+    names[username] = pubkey_hex
+    names_lower[username.lower()] = username
+    await committed
+
+    db = await get_db()
+    ts = int(time.time())
+    try:
+        cursor = await db.execute(
             "UPDATE records SET payment_completed=1, in_nostr_json=1, updated_at=? WHERE payment_hash=?",
             (ts, payment_hash)
         )
-
-        data["names"][username] = pubkey_hex
-        try:
-            save_nostr_json(data, domain)
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"Failed to write nostr.json, rolled back DB: {e}")
-            raise
-
         await db.commit()
+    except Exception as e:
+        await db.rollback()
+        await remove_nip05_entry(username, domain)
+        logger.error(f"Failed to confirm payment in DB, removed nostr.json entry: {e}")
+        raise
+    if cursor.rowcount == 0:
+        await remove_nip05_entry(username, domain)
+        logger.warning(f"Record for payment hash {payment_hash[:16]}... vanished, removed {username}@{domain}")
+        return False
 
     asyncio.create_task(send_nip05_registration_notification(pubkey_hex, username, domain))
 
@@ -232,6 +488,33 @@ async def check_and_add_nip05_entry_atomic(username: str, pubkey_hex: str, payme
     return True
 
 
+async def update_nip05_entry(username: str, pubkey_hex: str, domain: str) -> bool:
+    """Point an existing nostr.json entry at a new pubkey. Returns False if the name is absent."""
+    await refresh_nostr_cache(domain)
+    writer = _get_writer(domain)
+    existing_key = _latest_names(writer)[1].get(username.lower().strip())
+    if existing_key is None:
+        return False
+    names, _, committed = _stage(writer)
+    names[existing_key] = pubkey_hex
+    await committed
+    return True
+
+
+async def remove_nip05_entry(username: str, domain: str) -> bool:
+    """Remove a nostr.json entry. Returns False if the name is absent."""
+    await refresh_nostr_cache(domain)
+    writer = _get_writer(domain)
+    existing_key = _latest_names(writer)[1].get(username.lower().strip())
+    if existing_key is None:
+        return False
+    names, names_lower, committed = _stage(writer)
+    del names[existing_key]
+    del names_lower[existing_key.lower()]
+    await committed
+    return True
+
+
 async def send_nip05_registration_notification(pubkey_hex: str, username: str, domain: str) -> bool:
     """Send a Nostr notification to the user when their NIP-05 is registered."""
     from config import NOSTR_PRIVATE_KEY, NOSTR_NOTIFICATION_MESSAGE, NOSTR_RELAYS
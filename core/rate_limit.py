@@ -0,0 +1,9 @@
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from config import RATELIMIT_STORAGE_URI
+
+# Shared by main.py and every router so all limits use one storage backend.
+# moving-window avoids the 2x burst a fixed window allows across a boundary;
+# on redis:// it runs as a single Lua script over a sorted set.
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATELIMIT_STORAGE_URI, strategy="moving-window")
@@ -28,12 +28,10 @@ def verify_password(password: str, password_hash: str) -> bool:
 
 
 async def create_token(user: dict) -> str:
-    import aiosqlite
     from db.connection import get_db
     token = secrets.token_hex(32)
     now = int(time.time())
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     await db.execute(
         "INSERT INTO sessions (token, user_id, expires_at, created_at) VALUES (?, ?, ?, ?)",
         (token, user["id"], now + SESSION_TTL, now)
@@ -43,10 +41,8 @@ async def create_token(user: dict) -> str:
 
 
 async def verify_token(token: str) -> dict | None:
-    import aiosqlite
     from db.connection import get_db
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     now = int(time.time())
     cursor = await db.execute(
         """SELECT u.id, u.username, u.role
@@ -0,0 +1,8 @@
+from fastapi.templating import Jinja2Templates
+
+from config import BASE_DIR, TEMPLATES_AUTO_RELOAD
+
+# Shared by every router that renders HTML. Unless TEMPLATES_AUTO_RELOAD is set, Jinja
+# skips its per-render mtime check, so edits to templates/ need a restart.
+templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+templates.env.auto_reload = TEMPLATES_AUTO_RELOAD
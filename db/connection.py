@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 import aiosqlite
@@ -7,14 +8,37 @@ from db.migrations.manager import init_schema_version, run_migrations
 logger = logging.getLogger(__name__)
 
 _db_pool: aiosqlite.Connection | None = None
+_db_pool_lock = asyncio.Lock()
 
 
 async def get_db() -> aiosqlite.Connection:
     global _db_pool
-    if _db_pool is None:
-        _db_pool = await aiosqlite.connect(DB_PATH)
-        await _db_pool.execute("PRAGMA journal_mode=WAL")
-        await _db_pool.execute("PRAGMA foreign_keys=ON")
+    if _db_pool is not None:
+        return _db_pool
+    async with _db_pool_lock:
+        if _db_pool is None:
+            # Configure fully before publishing: PRAGMAs must not run on a connection
+            # other handlers may already have a transaction open on
+            db = await aiosqlite.connect(DB_PATH)
+            try:
+                db.row_factory = aiosqlite.Row
+                # One script, so initialisation is a single hop to the connection thread.
+                # WAL keeps synchronous=NORMAL durable across app crashes; only an OS crash
+                # can lose the last commits
+                await db.executescript(
+                    """
+                    PRAGMA journal_mode=WAL;
+                    PRAGMA synchronous=NORMAL;
+                    PRAGMA temp_store=MEMORY;
+                    PRAGMA cache_size=-20000;
+                    PRAGMA mmap_size=268435456;
+                    PRAGMA foreign_keys=ON;
+                    """
+                )
+            except Exception:
+                await db.close()
+                raise
+            _db_pool = db
     return _db_pool
 
 
@@ -0,0 +1,7 @@
+import aiosqlite
+
+
+async def upgrade(db: aiosqlite.Connection) -> None:
+    # Lookups filter on LOWER(nip05), which the plain UNIQUE index cannot serve
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_records_nip05_lower ON records(LOWER(nip05))")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_records_payment_hash ON records(payment_hash)")
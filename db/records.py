@@ -8,7 +8,6 @@ logger = logging.getLogger(__name__)
 
 async def get_all_records(limit: int = 12, offset: int = 0) -> tuple[list, int]:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     
     count_cursor = await db.execute("SELECT COUNT(*) as total FROM records")
     total = (await count_cursor.fetchone())["total"]
@@ -122,12 +121,10 @@ async def db_update_payment(payment_hash: str, in_nostr_json: bool = True) -> bo
 
 async def db_delete_record(nip05: str) -> bool:
     db = await get_db()
-    cursor = await db.execute("SELECT id FROM records WHERE LOWER(nip05) = ?", (nip05.lower(),))
-    row = await cursor.fetchone()
-    if not row:
-        return False
-    await db.execute("DELETE FROM records WHERE id = ?", (row[0],))
+    cursor = await db.execute("DELETE FROM records WHERE LOWER(nip05) = ?", (nip05.lower(),))
     await db.commit()
+    if cursor.rowcount == 0:
+        return False
     logger.info(f"DB deleted record nip05={nip05}")
     return True
 
@@ -136,7 +133,10 @@ async def db_delete_record_by_id(record_id: int) -> bool:
     db = await get_db()
     cursor = await db.execute("DELETE FROM records WHERE id = ?", (record_id,))
     await db.commit()
-    return cursor.rowcount > 0
+    if cursor.rowcount == 0:
+        return False
+    logger.info(f"DB deleted record id={record_id}")
+    return True
 
 
 async def db_update_record_pubkey(nip05: str, new_npub: str, new_pubkey_hex: str) -> bool:
@@ -169,7 +169,6 @@ async def db_update_nostr_json_status(nip05: str, in_nostr_json: bool) -> bool:
 
 async def db_get_nip05_by_payment_hash(payment_hash: str) -> str | None:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT nip05 FROM records WHERE payment_hash = ?", (payment_hash,)
     )
@@ -179,7 +178,6 @@ async def db_get_nip05_by_payment_hash(payment_hash: str) -> str | None:
 
 async def db_get_pending_record(nip05: str) -> dict | None:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         """SELECT id, nip05, npub, pubkey_hex, payment_hash, payment_completed, in_nostr_json, admin_only, registration_date, updated_at
            FROM records WHERE LOWER(nip05) = ? AND payment_completed = 0""",
@@ -9,7 +9,6 @@ logger = logging.getLogger(__name__)
 
 async def get_all_users() -> list:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT id, username, email, role, created_at, last_login, is_active FROM users ORDER BY id DESC"
     )
@@ -30,7 +29,6 @@ async def get_all_users() -> list:
 
 async def get_user_by_id(user_id: int) -> dict | None:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT id, username, email, role, created_at, last_login, is_active FROM users WHERE id = ?",
         (user_id,)
@@ -51,7 +49,6 @@ async def get_user_by_id(user_id: int) -> dict | None:
 
 async def get_user_profile(user_id: int) -> dict | None:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT id, username, email, role, created_at, last_login FROM users WHERE id = ?",
         (user_id,)
@@ -136,7 +133,6 @@ async def update_user_password(user_id: int, new_password: str) -> bool:
 async def authenticate_user(username: str, password: str) -> dict | None:
     from core.security import verify_password
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT * FROM users WHERE username = ? AND is_active = 1", (username.lower(),)
     )
@@ -154,7 +150,6 @@ async def authenticate_user(username: str, password: str) -> dict | None:
 
 async def create_password_reset_token(username: str) -> tuple[str, int] | None:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT id FROM users WHERE LOWER(username) = ? AND is_active = 1",
         (username.lower(),)
@@ -176,7 +171,6 @@ async def create_password_reset_token(username: str) -> tuple[str, int] | None:
 
 async def verify_password_reset_token(token: str) -> int | None:
     db = await get_db()
-    db.row_factory = aiosqlite.Row
     cursor = await db.execute(
         "SELECT user_id FROM password_reset_tokens WHERE token = ? AND used = 0 AND expires_at > ?",
         (token, int(time.time()))
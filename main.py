@@ -1,22 +1,23 @@
-import json
+import asyncio
 import logging
 import os
-import uuid
+import secrets
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import httpx
+import orjson
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
-from starlette.middleware.base import BaseHTTPMiddleware
+from slowapi.middleware import SlowAPIASGIMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from config import ALLOWED_ORIGINS, DOMAINS_LIST, NOSTR_DATA_DIR, PRIMARY_DOMAIN, STATIC_DIR, get_nostr_json_path
-from db.connection import init_db
+from core.rate_limit import limiter
+from db.connection import get_db, init_db
 from routers import admin_auth, admin_records, nip05, public
 import services.payments as payments_svc
 from services.payments import _validate_lnurl
@@ -24,11 +25,17 @@ from services.payments import _validate_lnurl
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ── Rate limiter ──────────────────────────────────────────────────────────────
-limiter = Limiter(key_func=get_remote_address)
-
 # ── App factory ───────────────────────────────────────────────────────────────
-app = FastAPI(title="NIP-05 Nostr Identifier")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+
+app = FastAPI(title="NIP-05 Nostr Identifier", default_response_class=ORJSONResponse, lifespan=lifespan)
 app.state.limiter = limiter
 
 
@@ -55,15 +62,15 @@ app.add_middleware(
 )
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Content-Security-Policy"] = (
+_SECURITY_HEADERS = tuple(
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in (
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ("Content-Security-Policy", (
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline' https://cdn.tailwindcss.com https://cdnjs.cloudflare.com; "
             "style-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com; "
@@ -71,22 +78,39 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             "font-src 'self' https://cdnjs.cloudflare.com; "
             "connect-src 'self' https:; "
             "frame-ancestors 'none';"
-        )
-        return response
+        )),
+    )
+)
+
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware: assigns a request ID and adds security headers in one hop."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = secrets.token_hex(4)
+        scope.setdefault("state", {})["request_id"] = request_id
 
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    *_SECURITY_HEADERS,
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        request_id = str(uuid.uuid4())[:8]
-        request.state.request_id = request_id
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
+        await self.app(scope, receive, send_with_headers)
 
 
 app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RequestIDMiddleware)
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(SlowAPIASGIMiddleware)
 
 # ── Routers ───────────────────────────────────────────────────────────────────
 app.include_router(public.router)
@@ -96,12 +120,14 @@ app.include_router(admin_records.router)
 
 
 # ── Lifecycle ─────────────────────────────────────────────────────────────────
-@app.on_event("startup")
 async def startup() -> None:
     from config import LNURL
-    from core.nostr import migrate_to_per_domain
+    from core.nostr import get_nostr_json_body, migrate_to_per_domain
     _validate_lnurl(LNURL)
-    payments_svc.http_client = httpx.AsyncClient(timeout=30.0)
+    payments_svc.http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(10.0, connect=3.0),
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30.0),
+    )
 
     # Create per-domain directories
     for domain_entry in DOMAINS_LIST:
@@ -119,6 +145,8 @@ async def startup() -> None:
             pass
 
     await init_db()
+    # Open the shared connection before serving so concurrent first requests don't race to create it
+    await get_db()
 
     # Migrate legacy centralized nostr.json to per-domain files
     migrate_to_per_domain()
@@ -129,17 +157,16 @@ async def startup() -> None:
         nostr_json_path = get_nostr_json_path(domain)
         if not nostr_json_path.exists():
             nostr_json_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(nostr_json_path, "w") as f:
-                json.dump({"names": {}}, f)
+            nostr_json_path.write_bytes(orjson.dumps({"names": {}}))
             os.chmod(nostr_json_path, 0o644)
             logger.info(f"Created empty nostr.json for {domain}")
+        # Parse and serialize once off the event loop so the first requests hit a warm cache
+        await asyncio.to_thread(get_nostr_json_body, domain)
 
     logger.info(f"Configured domains: {', '.join(d['domain'] + ':' + str(d['price']) + ' sats' for d in DOMAINS_LIST)}")
 
 
-@app.on_event("shutdown")
 async def shutdown() -> None:
-    from db.connection import _db_pool
     if payments_svc.http_client:
         await payments_svc.http_client.aclose()
     import db.connection as _db_mod
@@ -1,14 +1,12 @@
 import logging
-from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from config import COOKIE_SECURE, DOMAINS_LIST, PRIMARY_DOMAIN, SMTP_HOST
 from core.email import send_email
+from core.rate_limit import limiter
 from core.security import create_token, get_current_user, invalidate_token
+from core.templates import templates
 from db.users import (
     authenticate_user,
     create_password_reset_token,
@@ -27,10 +25,6 @@ from schemas import (
 )
 
 logger = logging.getLogger(__name__)
-limiter = Limiter(key_func=get_remote_address)
-
-BASE_DIR = Path(__file__).parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 router = APIRouter()
 
@@ -1,21 +1,20 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from config import DOMAINS_MAP
 from core.nostr import (
-    _nostr_json_lock,
     check_and_add_nip05_entry,
     convert_npub_to_hex,
-    load_nostr_json,
-    save_nostr_json,
+    remove_nip05_entry,
+    update_nip05_entry,
 )
+from core.rate_limit import limiter
 from core.security import get_current_user, require_role
 from db.connection import get_db
 from db.records import (
     db_create_admin_record,
     db_delete_record,
+    db_delete_record_by_id,
     db_update_record_pubkey,
     get_all_records,
 )
@@ -34,7 +33,6 @@ from schemas import (
 )
 
 logger = logging.getLogger(__name__)
-limiter = Limiter(key_func=get_remote_address)
 
 router = APIRouter()
 
@@ -109,15 +107,8 @@ async def manage_update_record(
     if not success:
         raise HTTPException(status_code=404, detail="Record not found")
 
-    async with _nostr_json_lock:
-        nostr_data = load_nostr_json(domain)
-        names = nostr_data.get("names", {})
-        existing_key = next((k for k in names if k.lower() == username.lower()), None)
-        if existing_key:
-            nostr_data["names"][existing_key] = pubkey_hex
-            save_nostr_json(nostr_data, domain)
-        else:
-            logger.warning(f"DB updated but nostr.json entry not found: {username}@{domain}")
+    if not await update_nip05_entry(username, pubkey_hex, domain):
+        logger.warning(f"DB updated but nostr.json entry not found: {username}@{domain}")
 
     return {"success": True}
 
@@ -137,15 +128,9 @@ async def manage_delete_record(request: Request, record_id: int, current_user: d
         raise HTTPException(status_code=500, detail="Stored NIP-05 is invalid")
     username, domain = parts
 
-    async with _nostr_json_lock:
-        nostr_data = load_nostr_json(domain)
-        names = nostr_data.get("names", {})
-        existing_key = next((k for k in names if k.lower() == username.lower()), None)
-        if existing_key:
-            del nostr_data["names"][existing_key]
-            save_nostr_json(nostr_data, domain)
+    await remove_nip05_entry(username, domain)
 
-    await db_delete_record(nip05)
+    await db_delete_record_by_id(record_id)
     return {"success": True}
 
 
@@ -1,12 +1,13 @@
+import asyncio
 import logging
 import secrets
 import httpx
+import orjson
 from fastapi import APIRouter, HTTPException, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from config import ADMIN_API_KEY, DOMAINS_MAP, LNKEY, LNURL
-from core.nostr import check_and_add_nip05_entry, check_and_add_nip05_entry_atomic, check_nip05_available, convert_npub_to_hex
+from core.nostr import check_and_add_nip05_entry, check_and_add_nip05_entry_atomic
+from core.rate_limit import limiter
 from db.records import (
     db_delete_record_by_id,
     db_get_nip05_by_payment_hash,
@@ -18,7 +19,6 @@ from schemas import CancelRegistrationRequest, CheckPaymentRequest, NIP05Request
 import services.payments as payments_svc
 
 logger = logging.getLogger(__name__)
-limiter = Limiter(key_func=get_remote_address)
 
 router = APIRouter()
 
@@ -26,11 +26,8 @@ router = APIRouter()
 @router.post("/api/create-invoice")
 @limiter.limit("10/minute")
 async def create_invoice(request: Request, data: NIP05Request):
-    try:
-        username = data.username.strip()
-        pubkey_hex = convert_npub_to_hex(data.pubkey)
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    username = data.username.strip()
+    pubkey_hex = data.pubkey_hex
 
     domain = data.domain
     price = DOMAINS_MAP[domain]
@@ -43,9 +40,9 @@ async def create_invoice(request: Request, data: NIP05Request):
 
     if pending_record:
         existing_hash = pending_record["payment_hash"]
-        payment_status = await payments_svc.get_payment_status_from_lnbits(existing_hash)
+        payment = await payments_svc.get_payment_from_lnbits(existing_hash) or {}
 
-        if payment_status and payment_status.get("paid"):
+        if payment.get("paid"):
             return {
                 "payment_request": None,
                 "payment_hash": existing_hash,
@@ -57,7 +54,7 @@ async def create_invoice(request: Request, data: NIP05Request):
                 "message": "Payment already completed",
             }
 
-        payment_request = await payments_svc.get_invoice_from_lnbits(existing_hash)
+        payment_request = payments_svc.extract_payment_request(payment)
         if payment_request:
             return {
                 "payment_request": payment_request,
@@ -75,7 +72,7 @@ async def create_invoice(request: Request, data: NIP05Request):
     try:
         response = await payments_svc.http_client.post(
             f"{LNURL}/api/v1/payments",
-            headers={"X-Api-Key": LNKEY, "Content-Type": "application/json"},
+            headers=payments_svc.LN_HEADERS,
             json={
                 "out": False,
                 "amount": price,
@@ -87,12 +84,8 @@ async def create_invoice(request: Request, data: NIP05Request):
             logger.error(f"LNbits invoice creation failed: status={response.status_code}")
             raise HTTPException(status_code=500, detail="Failed to create invoice")
 
-        invoice_data = response.json()
-        payment_request = (
-            invoice_data.get("payment_request")
-            or invoice_data.get("bolt11")
-            or invoice_data.get("pr")
-        )
+        invoice_data = orjson.loads(response.content)
+        payment_request = payments_svc.extract_payment_request(invoice_data)
         payment_hash = (
             invoice_data.get("payment_hash")
             or invoice_data.get("checking_id")
@@ -149,11 +142,19 @@ async def check_payment(request: Request, data: CheckPaymentRequest):
         raise HTTPException(status_code=500, detail="Lightning payment not configured")
 
     username = data.username.strip()
-    pubkey_hex = convert_npub_to_hex(data.pubkey)
+    pubkey_hex = data.pubkey_hex
     payment_hash = data.payment_hash
     domain = data.domain
 
-    registered_nip05 = await db_get_nip05_by_payment_hash(payment_hash)
+    # Ownership lookup and LNbits settlement check are independent; run them together
+    registered_nip05, payment_data = await asyncio.gather(
+        db_get_nip05_by_payment_hash(payment_hash),
+        payments_svc.get_payment_check_from_lnbits(payment_hash),
+        return_exceptions=True,
+    )
+    if isinstance(registered_nip05, BaseException):
+        raise registered_nip05
+
     expected_nip05 = f"{username}@{domain}"
     if registered_nip05 != expected_nip05:
         logger.warning(
@@ -162,40 +163,35 @@ async def check_payment(request: Request, data: CheckPaymentRequest):
         )
         raise HTTPException(status_code=400, detail="Payment hash does not match this registration")
 
-    try:
-        response = await payments_svc.http_client.get(
-            f"{LNURL}/api/v1/payments/{payment_hash}",
-            headers={"X-Api-Key": LNKEY},
-        )
-        if response.status_code != 200:
-            return {"paid": False}
-
-        payment_data = response.json()
-
-        if payment_data.get("paid"):
-            memo = payment_data.get("memo") or payment_data.get("description") or ""
-            if memo:
-                expected_memo = f"NIP-05: {username}@{domain}"
-                if not memo.startswith("NIP-05:"):
-                    logger.warning(f"Payment hash {payment_hash[:16]}... has unexpected memo: {memo}")
-                    return {"paid": False}
-                if memo != expected_memo:
-                    logger.warning(f"Payment memo mismatch: expected '{expected_memo}', got '{memo}'")
-                    return {"paid": False}
-            else:
-                logger.info(f"Payment hash {payment_hash[:16]}... has no memo, accepting")
-
-            success = await check_and_add_nip05_entry_atomic(username, pubkey_hex, payment_hash, domain)
-            if success:
-                return {"paid": True}
-            logger.warning(f"Payment verified but username {username} is already taken")
-            return {"paid": False, "error": "Username already registered"}
-
+    if isinstance(payment_data, httpx.RequestError):
+        logger.error(f"LNbits connection error in check_payment: {payment_data}")
         return {"paid": False}
-    except httpx.RequestError as e:
-        logger.error(f"LNbits connection error in check_payment: {e}")
+    if isinstance(payment_data, BaseException):
+        raise payment_data
+    if payment_data is None:
         return {"paid": False}
 
+    if payment_data.get("paid"):
+        memo = payment_data.get("memo") or payment_data.get("description") or ""
+        if memo:
+            expected_memo = f"NIP-05: {username}@{domain}"
+            if not memo.startswith("NIP-05:"):
+                logger.warning(f"Payment hash {payment_hash[:16]}... has unexpected memo: {memo}")
+                return {"paid": False}
+            if memo != expected_memo:
+                logger.warning(f"Payment memo mismatch: expected '{expected_memo}', got '{memo}'")
+                return {"paid": False}
+        else:
+            logger.info(f"Payment hash {payment_hash[:16]}... has no memo, accepting")
+
+        success = await check_and_add_nip05_entry_atomic(username, pubkey_hex, payment_hash, domain)
+        if success:
+            return {"paid": True}
+        logger.warning(f"Payment verified but username {username} is already taken")
+        return {"paid": False, "error": "Username already registered"}
+
+    return {"paid": False}
+
 
 @router.post("/api/register")
 @limiter.limit("5/minute")
@@ -208,19 +204,29 @@ async def register_nip05(data: NIP05Request, request: Request):
         raise HTTPException(status_code=401, detail="Invalid admin API key")
 
     username = data.username.strip()
-    pubkey_hex = convert_npub_to_hex(data.pubkey)
+    pubkey_hex = data.pubkey_hex
     domain = data.domain
 
-    if not await check_and_add_nip05_entry(username, pubkey_hex, domain):
+    # The UNIQUE insert is the cheap duplicate check; only then pay for the nostr.json write
+    try:
+        record_id = await db_insert_record(
+            nip05=f"{username}@{domain}",
+            npub=data.pubkey,
+            pubkey_hex=pubkey_hex,
+            payment_completed=True,
+            admin_only=True,
+            in_nostr_json=True,
+        )
+    except ValueError:
         raise HTTPException(status_code=400, detail="This NIP-05 identifier is already in use")
 
-    await db_insert_record(
-        nip05=f"{username}@{domain}",
-        npub=data.pubkey,
-        pubkey_hex=pubkey_hex,
-        payment_completed=True,
-        admin_only=True,
-        in_nostr_json=True,
-    )
+    try:
+        added = await check_and_add_nip05_entry(username, pubkey_hex, domain)
+    except Exception:
+        await db_delete_record_by_id(record_id)
+        raise
+    if not added:
+        await db_delete_record_by_id(record_id)
+        raise HTTPException(status_code=400, detail="This NIP-05 identifier is already in use")
 
     return {"success": True, "nip05": f"{username}@{domain}"}
@@ -1,39 +1,47 @@
-import re
+import functools
+import hashlib
 import logging
-from pathlib import Path
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-from config import DOMAINS_LIST, DOMAINS_MAP, PRIMARY_DOMAIN, STATIC_DIR, get_nostr_json_path
-from core.nostr import check_nip05_available, convert_npub_to_hex, load_nostr_json
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response
+from jinja2 import TemplateError
+
+from config import DOMAINS_LIST, DOMAINS_MAP, PRIMARY_DOMAIN, STATIC_DIR, TEMPLATES_AUTO_RELOAD
+from core.nostr import (
+    check_nip05_available,
+    get_nostr_json_body,
+    get_nostr_json_gzip,
+    is_pubkey_registered,
+    load_nostr_json_cached,
+    refresh_nostr_cache,
+)
+from core.rate_limit import limiter
+from core.templates import templates
 from db.connection import get_db
-from schemas import CheckPubkeyRequest, ConvertPubkeyRequest
+from schemas import USERNAME_RE, CheckPubkeyRequest, ConvertPubkeyRequest
 
 logger = logging.getLogger(__name__)
-limiter = Limiter(key_func=get_remote_address)
-
-BASE_DIR = Path(__file__).parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 router = APIRouter()
 
 
+def _render_index() -> bytes:
+    return templates.get_template("index.html").render(
+        domain=PRIMARY_DOMAIN,
+        price_sats=DOMAINS_MAP[PRIMARY_DOMAIN],
+        domains=DOMAINS_LIST,
+    ).encode()
+
+
+if not TEMPLATES_AUTO_RELOAD:
+    # Every input is fixed configuration, so the page only needs rendering once per process
+    _render_index = functools.lru_cache(maxsize=1)(_render_index)
+
+
 @router.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     try:
-        return templates.TemplateResponse(
-            "index.html",
-            {
-                "request": request,
-                "domain": PRIMARY_DOMAIN,
-                "price_sats": DOMAINS_MAP[PRIMARY_DOMAIN],
-                "domains": DOMAINS_LIST,
-            }
-        )
-    except Exception as e:
+        return HTMLResponse(content=_render_index(), headers={"Cache-Control": "public, max-age=300"})
+    except TemplateError as e:
         return HTMLResponse(content=f"Error: {str(e)}", status_code=500)
 
 
@@ -51,15 +59,13 @@ async def health():
     }
 
     try:
-        total = 0
         for d in DOMAINS_LIST:
-            domain = d["domain"]
-            nostr_json_path = get_nostr_json_path(domain)
-            if nostr_json_path.exists():
-                data = load_nostr_json(domain)
-                total += len(data.get("names", {}))
-        health_status["registered_users"] = total
-    except Exception:
+            await refresh_nostr_cache(d["domain"])
+        # Served from the stat-validated cache; a missing file counts as empty
+        health_status["registered_users"] = sum(
+            len(load_nostr_json_cached(d["domain"])["names"]) for d in DOMAINS_LIST
+        )
+    except OSError:
         health_status["status"] = "degraded"
         health_status["nostr_json"] = "error"
 
@@ -67,47 +73,64 @@ async def health():
     return JSONResponse(content=health_status, status_code=status_code)
 
 
+_EMPTY_NOSTR_JSON = b'{"names":{}}'
+_EMPTY_NOSTR_JSON_ETAG = f'"{hashlib.sha256(_EMPTY_NOSTR_JSON).hexdigest()[:16]}"'
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True if Accept-Encoding allows gzip with a non-zero q-value, explicitly or via "*"."""
+    qvalues = {}
+    for part in accept_encoding.lower().split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
 @router.get("/.well-known/nostr.json")
 async def get_nostr_json(request: Request):
     host = request.headers.get("host", "").split(":")[0].lower()
+    gz = None
     if host in DOMAINS_MAP:
-        data = load_nostr_json(host)
-        names = data.get("names", {})
+        await refresh_nostr_cache(host)
+        if _accepts_gzip(request.headers.get("accept-encoding", "")):
+            gz = get_nostr_json_gzip(host)
+        body, etag = gz or get_nostr_json_body(host)
     else:
-        names = {}
-    return JSONResponse(content={"names": names})
+        body, etag = _EMPTY_NOSTR_JSON, _EMPTY_NOSTR_JSON_ETAG
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if gz:
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/api/convert-pubkey")
 @limiter.limit("20/minute")
 async def convert_pubkey(request: Request, data: ConvertPubkeyRequest):
-    try:
-        hex_key = convert_npub_to_hex(data.pubkey)
-        return {"hex": hex_key}
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=str(e))
+    return {"hex": data.pubkey_hex}
 
 
 @router.post("/api/check-pubkey")
 @limiter.limit("20/minute")
 async def check_pubkey(request: Request, data: CheckPubkeyRequest):
-    try:
-        hex_key = convert_npub_to_hex(data.pubkey)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-
-    domain = data.domain
-    nostr_data = load_nostr_json(domain)
-    for existing_hex in nostr_data.get("names", {}).values():
-        if existing_hex.lower() == hex_key.lower():
-            return {"hex": hex_key, "registered": True}
-    return {"hex": hex_key, "registered": False}
+    hex_key = data.pubkey_hex
+    await refresh_nostr_cache(data.domain)
+    return {"hex": hex_key, "registered": is_pubkey_registered(data.domain, hex_key)}
 
 
 @router.get("/api/check-availability/{username}")
 @limiter.limit("30/minute")
 async def check_availability(request: Request, username: str, domain: str = ""):
-    if not re.match(r'^[a-zA-Z0-9_-]{1,30}$', username):
+    if not USERNAME_RE.match(username):
         raise HTTPException(status_code=400, detail="Invalid username format")
     if not domain:
         domain = PRIMARY_DOMAIN
@@ -126,39 +149,30 @@ async def get_domains(request: Request):
 @router.get("/api/latest-records")
 @limiter.limit("30/minute")
 async def latest_records(request: Request):
-    import aiosqlite
     db = await get_db()
-    db.row_factory = aiosqlite.Row
+    # Masking happens in SQL: nip05 keeps username[3:] and the domain, npub keeps its middle
     cursor = await db.execute(
-        """SELECT nip05, npub, payment_completed, in_nostr_json, admin_only, updated_at
+        """SELECT
+               CASE WHEN instr(nip05, '@') = 0 THEN nip05
+                    ELSE '***' || substr(nip05, 4, max(instr(nip05, '@') - 4, 0)) || substr(nip05, instr(nip05, '@'))
+               END,
+               CASE WHEN length(npub) > 20
+                    THEN 'npub1********' || substr(npub, 9, length(npub) - 16) || '********'
+                    ELSE npub
+               END,
+               payment_completed, in_nostr_json, admin_only, updated_at
            FROM records ORDER BY id DESC LIMIT 5"""
     )
     rows = await cursor.fetchall()
 
-    result = []
-    for row in rows:
-        nip05 = row["nip05"]
-        npub = row["npub"]
-
-        if "@" in nip05:
-            parts = nip05.split("@")
-            username = parts[0]
-            protected_nip05 = f"***@{parts[1]}" if len(username) <= 3 else f"***{username[3:]}@{parts[1]}"
-        else:
-            protected_nip05 = nip05
-
-        if npub and len(npub) > 20:
-            protected_npub = f"npub1{'*' * 8}{npub[8:-8]}{'*' * 8}"
-        else:
-            protected_npub = npub
-
-        result.append({
+    return [
+        {
             "nip05": protected_nip05,
             "npub": protected_npub,
-            "in_nostr_json": bool(row["in_nostr_json"]),
-            "payment_completed": bool(row["payment_completed"]),
-            "admin_only": bool(row["admin_only"]),
-            "updated_at": row["updated_at"],
-        })
-
-    return result
+            "in_nostr_json": bool(in_nostr_json),
+            "payment_completed": bool(payment_completed),
+            "admin_only": bool(admin_only),
+            "updated_at": updated_at,
+        }
+        for protected_nip05, protected_npub, payment_completed, in_nostr_json, admin_only, updated_at in rows
+    ]
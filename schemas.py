@@ -1,21 +1,28 @@
 import re
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
+from config import DOMAINS_MAP, PRIMARY_DOMAIN
 from core.nostr import convert_npub_to_hex
 
+USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]{1,30}\Z')
+_PAYMENT_HASH_RE = re.compile(r'^[a-fA-F0-9]{64}\Z')
+
 
 class ValidatedUsernameMixin:
     @field_validator('username')
     @classmethod
     def validate_username(cls, v: str) -> str:
-        if not re.match(r'^[a-zA-Z0-9_-]{1,30}$', v):
+        if not USERNAME_RE.match(v):
             raise ValueError(
                 'Username must be 1-30 characters, letters, numbers, underscores or hyphens only'
             )
         return v
 
 
-class ValidatedPubkeyMixin:
-    @field_validator('pubkey')
+class ValidatedPubkeyMixin(BaseModel):
+    # A BaseModel so pydantic registers the private attribute; `pubkey` is declared by each model
+    _pubkey_hex: str = PrivateAttr(default="")
+
+    @field_validator('pubkey', check_fields=False)
     @classmethod
     def validate_pubkey(cls, v: str) -> str:
         try:
@@ -24,12 +31,21 @@ class ValidatedPubkeyMixin:
             raise ValueError(str(e))
         return v
 
+    @model_validator(mode='after')
+    def store_pubkey_hex(self):
+        # convert_npub_to_hex is memoized, so this reuses the decode done above
+        self._pubkey_hex = convert_npub_to_hex(self.pubkey)
+        return self
+
+    @property
+    def pubkey_hex(self) -> str:
+        return self._pubkey_hex
+
 
 class ValidatedDomainMixin:
     @field_validator('domain')
     @classmethod
     def validate_domain(cls, v: str) -> str:
-        from config import DOMAINS_MAP, PRIMARY_DOMAIN
         if not v:
             return PRIMARY_DOMAIN
         if v not in DOMAINS_MAP:
@@ -61,7 +77,7 @@ class CheckPaymentRequest(ValidatedPubkeyMixin, ValidatedUsernameMixin, Validate
     @field_validator('payment_hash')
     @classmethod
     def validate_payment_hash(cls, v: str) -> str:
-        if not re.match(r'^[a-fA-F0-9]{64}$', v):
+        if not _PAYMENT_HASH_RE.match(v):
             raise ValueError('Invalid payment hash format')
         return v
 
@@ -1,12 +1,21 @@
+import asyncio
 import logging
+import time
+from types import MappingProxyType
 from urllib.parse import urlparse
 import httpx
+import ijson
+import orjson
 from config import LNURL, LNKEY
 
 logger = logging.getLogger(__name__)
 
 http_client: httpx.AsyncClient | None = None
 
+# Built once: LNbits credentials never change at runtime
+LN_HEADERS = MappingProxyType({"X-Api-Key": LNKEY, "Content-Type": "application/json"})
+LN_HEADERS_GET = MappingProxyType({"X-Api-Key": LNKEY})
+
 
 def _validate_lnurl(url: str) -> None:
     if not url:
@@ -18,37 +27,98 @@ def _validate_lnurl(url: str) -> None:
         raise ValueError("LNBITS_URL must include a valid host")
 
 
-async def get_payment_status_from_lnbits(payment_hash: str) -> dict | None:
+async def get_payment_from_lnbits(payment_hash: str) -> dict | None:
+    """Fetch an invoice's LNbits record once; callers read both status and bolt11 from it."""
     if not LNURL or not LNKEY:
         return None
     try:
         response = await http_client.get(
             f"{LNURL}/api/v1/payments/{payment_hash}",
-            headers={"X-Api-Key": LNKEY},
+            headers=LN_HEADERS_GET,
         )
         if response.status_code != 200:
             return None
-        data = response.json()
-        return {
-            "paid": data.get("paid", False),
-            "pending": data.get("pending", False),
-            "expired": data.get("expired", False) if "expired" in data else False,
-        }
-    except Exception:
+        data = orjson.loads(response.content)
+    except (httpx.HTTPError, ValueError):
         return None
+    return data if isinstance(data, dict) else None
 
 
-async def get_invoice_from_lnbits(payment_hash: str) -> str | None:
-    if not LNURL or not LNKEY:
-        return None
-    try:
-        response = await http_client.get(
-            f"{LNURL}/api/v1/payments/{payment_hash}",
-            headers={"X-Api-Key": LNKEY},
-        )
+def extract_payment_request(data: dict) -> str | None:
+    return data.get("payment_request") or data.get("bolt11") or data.get("pr")
+
+
+class _AsyncStreamReader:
+    """Minimal async file-like adapter so ijson can consume an httpx byte stream."""
+
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs str; don't consume a chunk
+            return b""
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
+_PAYMENT_CHECK_KEYS = frozenset(("paid", "memo", "description"))
+
+# Polls for the same invoice within this window share one upstream request
+_PAYMENT_CHECK_TTL = 2.0
+_PAYMENT_CHECK_CACHE_MAX = 1024
+_payment_check_cache: dict[str, tuple[float, dict | None]] = {}
+_payment_check_inflight: dict[str, asyncio.Task] = {}
+
+
+def _store_payment_check(payment_hash: str, task: asyncio.Task) -> None:
+    _payment_check_inflight.pop(payment_hash, None)
+    # Errors are not cached so the next poll retries upstream
+    if task.cancelled() or task.exception() is not None:
+        return
+    now = time.monotonic()
+    if len(_payment_check_cache) >= _PAYMENT_CHECK_CACHE_MAX:
+        for key in [k for k, (expires, _) in _payment_check_cache.items() if expires <= now]:
+            del _payment_check_cache[key]
+    _payment_check_cache[payment_hash] = (now + _PAYMENT_CHECK_TTL, task.result())
+
+
+async def get_payment_check_from_lnbits(payment_hash: str) -> dict | None:
+    """Return the paid/memo fields for an invoice, coalescing concurrent and back-to-back polls."""
+    cached = _payment_check_cache.get(payment_hash)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    task = _payment_check_inflight.get(payment_hash)
+    if task is None:
+        task = asyncio.create_task(_fetch_payment_check(payment_hash))
+        _payment_check_inflight[payment_hash] = task
+        task.add_done_callback(lambda t: _store_payment_check(payment_hash, t))
+    # Shielded so one disconnecting poller does not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+
+async def _fetch_payment_check(payment_hash: str) -> dict | None:
+    """Fetch only the fields check_payment needs, aborting the stream once they are seen."""
+    fields = {}
+    async with http_client.stream(
+        "GET",
+        f"{LNURL}/api/v1/payments/{payment_hash}",
+        headers=LN_HEADERS_GET,
+    ) as response:
         if response.status_code != 200:
             return None
-        data = response.json()
-        return data.get("payment_request") or data.get("bolt11") or data.get("pr")
-    except Exception:
-        return None
+        try:
+            async for key, value in ijson.kvitems_async(_AsyncStreamReader(response), ""):
+                if key in _PAYMENT_CHECK_KEYS:
+                    fields[key] = value
+                    # check_payment uses `memo or description`, so stop only once that is settled
+                    if "paid" in fields and (
+                        fields.get("memo") or ("memo" in fields and "description" in fields)
+                    ):
+                        break
+        except ijson.JSONError:
+            logger.error(f"Invalid JSON from LNbits for payment {payment_hash[:16]}...")
+            return None
+    return fields